@@ -3,7 +3,8 @@ Project database model.
 """
 from datetime import datetime
 from typing import List
-from sqlalchemy import String, Boolean, Text
+from sqlalchemy import String, Boolean, Text, func, select
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -31,7 +32,18 @@ class Project(Base):
                 raise ValueError("Project name cannot exceed 255 characters")
         super().__init__(**kwargs)
 
-    @property
+    @hybrid_property
     def latest_version_number(self) -> int:
         """Get the latest version number from loaded versions."""
         return max((v.version_number for v in self.versions), default=0)
+
+    @latest_version_number.expression
+    def latest_version_number(cls):
+        """Compute the latest version number in SQL, 0 if there are no versions."""
+        # Imported here because version.py imports this module
+        from .version import Version
+        return (
+            select(func.coalesce(func.max(Version.version_number), 0))
+            .where(Version.project_id == cls.id)
+            .scalar_subquery()
+        )
@@ -1,38 +1,52 @@
 """Test fixtures for models."""
+import os
 import pytest
 import pytest_asyncio
-import asyncio
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from unittest.mock import AsyncMock, MagicMock, PropertyMock
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
-from uuid import UUID, uuid4
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy import event, make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool, StaticPool
 from ...models.project import Project
 from ...models.version import Version
 from ...models.file import File
 from ...models.base import Base
+from .fakes import FakeFile, FakeProject, FakeVersion, next_uuid
 
-@pytest.fixture
-def event_loop():
-    """Create a new event loop for each test.
-    
-    This prevents issues with loop closure and ensures each test
-    gets a fresh event loop instance.
-    """
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    asyncio.set_event_loop(loop)
-    yield loop
-    # Clean up pending tasks
-    pending = asyncio.all_tasks(loop)
-    if pending:
-        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
-    loop.close()
-
-@pytest_asyncio.fixture(scope="function")
-async def mock_db_session():
-    """Create a mock database session."""
-    session = AsyncMock(spec=AsyncSession)
-    
+try:
+    import uvloop
+except ImportError:  # Optional; not available on Windows
+    uvloop = None
+
+# The model each dataclass fake stands in for
+_FAKE_MODELS = {FakeProject: Project, FakeVersion: Version, FakeFile: File}
+
+def pytest_collection_modifyitems(items):
+    """Mark tests that use the real database so unit runs can skip them.
+
+    Run only the mock-based unit tests with ``pytest -m "not integration"``.
+    """
+    for item in items:
+        if "db_engine" in getattr(item, "fixturenames", ()):
+            item.add_marker(pytest.mark.integration)
+
+if uvloop is not None:
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_asyncio_loop_factories(config, item):
+        """Run async tests on uvloop when it is installed.
+
+        The hook needs pytest-asyncio 1.4+; older versions ignore it and
+        keep the default loop.
+        """
+        return {"uvloop": uvloop.new_event_loop}
+
+def _configure_mock_session(session):
+    """Install the fake session behaviour on ``session``.
+
+    Called before every test so state and call records from one test never
+    leak into the next, while the spec'd mock itself is built only once.
+    """
     # Mock the nested transaction context
     nested_transaction = AsyncMock()
     session.begin_nested.return_value.__aenter__.return_value = nested_transaction
@@ -109,42 +123,313 @@ async def mock_db_session():
         session.deleted.add(obj)
         return original_delete(obj)
     session.delete = MagicMock(side_effect=mock_delete)
-    
-    yield session
-    
-    # Cleanup
-    await session.close()
+
+@pytest.fixture(scope="session")
+def mock_db_session():
+    """Create a mock database session once per test session.
+
+    ``_reset_mocks`` installs a fresh fake behaviour before each test.
+    """
+    session = AsyncMock(spec=AsyncSession)
+    _configure_mock_session(session)
+    return session
 
 @pytest.fixture
-def mock_models():
-    """Create mock models for testing."""
-    models = MagicMock()
-    
-    # Setup Project mock
-    project_mock = MagicMock(spec=Project)
-    project_mock.id = uuid4()
-    project_mock.active = True
-    project_mock.versions = []
-    models.Project = MagicMock(return_value=project_mock)
-    
-    # Setup Version mock
-    version_mock = MagicMock(spec=Version)
-    version_mock.id = uuid4()
-    version_mock.files = []
-    type(version_mock).active = PropertyMock(return_value=True)
-    models.Version = MagicMock(return_value=version_mock)
-    
-    # Setup File mock
-    file_mock = MagicMock(spec=File)
-    file_mock.id = uuid4()
-    models.File = MagicMock(return_value=file_mock)
-    
-    # Add TestModel support
-    test_model_mock = MagicMock(spec=Base)
+def raise_on_commit(mock_db_session):
+    """Make ``mock_db_session.commit`` raise inside a ``with`` block.
+
+    The previous side effect is restored on exit, even if the block fails,
+    so later commits in the test go through the normal mock again.
+    """
+    @contextmanager
+    def _raise_on_commit(exc):
+        previous = mock_db_session.commit.side_effect
+        mock_db_session.commit.side_effect = exc
+        try:
+            yield
+        finally:
+            mock_db_session.commit.side_effect = previous
+    return _raise_on_commit
+
+@pytest.fixture
+def install_project_mock(mock_models):
+    """Make ``mock_models.Project(...)`` return ``project`` inside a ``with`` block.
+
+    The block receives ``project``; the previous return value is restored
+    on exit.
+    """
+    @contextmanager
+    def _install_project_mock(project):
+        previous = mock_models.Project.return_value
+        mock_models.Project.return_value = project
+        try:
+            yield project
+        finally:
+            mock_models.Project.return_value = previous
+    return _install_project_mock
+
+@pytest.fixture
+def set_query_results(mock_db_session):
+    """Queue the lists returned by ``session.query(...).filter(...).all()``.
+
+    Each call to ``all()`` returns the next list, in order.
+    """
+    def _set_query_results(*results):
+        mock_db_session.query = MagicMock()
+        mock_db_session.query.return_value.filter.return_value.all = MagicMock(
+            side_effect=list(results)
+        )
+    return _set_query_results
+
+@pytest.fixture
+def set_scalars_results(mock_db_session):
+    """Queue the lists returned by ``(await session.scalars(stmt)).all()``.
+
+    Each awaited ``scalars`` call yields a result whose ``all()`` returns
+    the next list, in order.
+    """
+    def _set_scalars_results(*results):
+        mock_db_session.scalars = AsyncMock(
+            side_effect=[MagicMock(**{"all.return_value": result}) for result in results]
+        )
+    return _set_scalars_results
+
+@pytest.fixture
+def set_session_get(mock_db_session):
+    """Make ``mock_db_session.get`` return the given fakes by model and id.
+
+    Each fake is keyed on the model it stands in for and its ``id``; any
+    other lookup returns None.
+    """
+    def _set_session_get(*entities):
+        lookup = {(_FAKE_MODELS.get(type(e), type(e)), e.id): e for e in entities}
+        mock_db_session.get = MagicMock(side_effect=lambda model, id_: lookup.get((model, id_)))
+    return _set_session_get
+
+@pytest.fixture
+def mock_project_factory():
+    """Return a factory for :class:`FakeProject` stand-ins.
+
+    ``version_numbers`` gives one :class:`FakeVersion` per number, in that
+    order; any other keyword is passed through to the project.
+    """
+    def _make(version_numbers=(), **attrs):
+        project = FakeProject(**attrs)
+        project.versions = [
+            FakeVersion(project_id=project.id, version_number=number, name=f"Version {number}")
+            for number in version_numbers
+        ]
+        return project
+    return _make
+
+def _configure_mock_models(models):
+    """Point each mock model class at a fresh default instance.
+
+    Project, Version and File return new dataclass fakes, so no state is
+    shared with earlier tests. ``TestModel`` gets a new spec'd mock, since
+    test_base.py tests record calls on it.
+    """
+    models.Project = MagicMock(return_value=FakeProject())
+    models.Version = MagicMock(return_value=FakeVersion())
+    models.File = MagicMock(return_value=FakeFile())
+
     # Let the test set these values
+    test_model_mock = MagicMock(spec=Base)
     test_model_mock.id = None
     test_model_mock.created_at = None
     test_model_mock.updated_at = None
     models.TestModel = MagicMock(return_value=test_model_mock)
-    
+
+@pytest.fixture(scope="session")
+def mock_models():
+    """Create mock models once per test session."""
+    models = MagicMock()
+    _configure_mock_models(models)
     return models
+
+@pytest.fixture(autouse=True)
+def _reset_mocks(mock_db_session, mock_models):
+    """Reset the session-scoped mocks before every test.
+
+    Call records, return values and side effects are cleared and the fake
+    behaviour is installed again, so tests stay isolated without rebuilding
+    the spec'd mocks.
+    """
+    mock_db_session.reset_mock(return_value=True, side_effect=True)
+    _configure_mock_session(mock_db_session)
+    _configure_mock_models(mock_models)
+
+@pytest.fixture(scope="session")
+def database_url():
+    """Database URL for model tests.
+
+    Defaults to an in-memory SQLite database; set TEST_DATABASE_URL to run
+    the same tests against PostgreSQL.
+    """
+    return os.environ.get("TEST_DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+async def _create_worker_database(url, worker):
+    """Create ``<database>_<worker>`` on the server if missing and return its URL."""
+    worker_url = url.set(database=f"{url.database}_{worker}")
+    admin = create_async_engine(url, isolation_level="AUTOCOMMIT")
+    try:
+        async with admin.connect() as conn:
+            exists = await conn.scalar(
+                text("SELECT 1 FROM pg_database WHERE datname = :name"),
+                {"name": worker_url.database}
+            )
+            if not exists:
+                await conn.exec_driver_sql(f'CREATE DATABASE "{worker_url.database}"')
+    finally:
+        await admin.dispose()
+    return worker_url
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def db_engine(database_url):
+    """Create the test engine with the schema created once per test session.
+
+    Modules share the engine; isolation comes from the per-module outer
+    transaction and the per-test SAVEPOINT, never from recreating tables.
+    """
+    if not database_url.startswith("sqlite"):
+        url = make_url(database_url)
+        worker = os.environ.get("PYTEST_XDIST_WORKER")
+        if worker:
+            # Each xdist worker gets its own database; in-memory SQLite
+            # is already private to the worker process.
+            url = await _create_worker_database(url, worker)
+        # The engine is created on the session loop but checked out on each
+        # module's loop; NullPool opens a fresh connection on every checkout
+        # so no pooled connection outlives the loop that opened it.
+        engine = create_async_engine(url, poolclass=NullPool)
+    else:
+        # StaticPool keeps a single connection so the in-memory database
+        # survives for the lifetime of the engine.
+        engine = create_async_engine(database_url, poolclass=StaticPool)
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def _configure_sqlite(dbapi_connection, connection_record):
+            # pysqlite manages transactions itself, which breaks SAVEPOINT
+            # handling; let SQLAlchemy emit BEGIN explicitly instead.
+            dbapi_connection.isolation_level = None
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.close()
+
+        @event.listens_for(engine.sync_engine, "begin")
+        def _emit_begin(connection):
+            connection.exec_driver_sql("BEGIN")
+
+    # A fresh in-memory database has no tables, so skip create_all's
+    # per-table existence checks; server databases may persist between runs.
+    checkfirst = not database_url.startswith("sqlite")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, checkfirst=checkfirst)
+
+    yield engine
+
+    await engine.dispose()
+
+@pytest_asyncio.fixture(scope="module")
+async def db_connection(db_engine):
+    """Open one connection with an outer transaction for the whole module.
+
+    Nothing is ever committed to the database; the outer transaction is
+    rolled back once all tests in the module have run.
+    """
+    async with db_engine.connect() as conn:
+        transaction = await conn.begin()
+        yield conn
+        await transaction.rollback()
+
+@pytest_asyncio.fixture(scope="module")
+async def module_db_session(db_connection):
+    """Create a module-scoped session for shared, read-only seed data."""
+    session = AsyncSession(
+        bind=db_connection,
+        join_transaction_mode="create_savepoint",
+        expire_on_commit=False
+    )
+    yield session
+    await session.close()
+
+@pytest_asyncio.fixture(scope="module")
+async def seeded_version(module_db_session):
+    """Create a project with a user version once per module.
+
+    Yields the version id. Tests must not modify the seeded rows; anything
+    they add through ``db_session`` is rolled back after each test.
+    """
+    project = Project(name="Test Project")
+    module_db_session.add(project)
+    await module_db_session.commit()
+
+    # Primary keys are generated client-side, so no refresh is needed
+    version = Version(project_id=project.id, version_number=1, name="Test Version")
+    module_db_session.add(version)
+    await module_db_session.commit()
+
+    yield version.id
+
+@pytest_asyncio.fixture(scope="module")
+async def sample_project(module_db_session):
+    """Create a project with a chain of three versions once per module.
+
+    Yields the project id. Like ``seeded_version`` it is shared, so only
+    read-only tests should use it.
+    """
+    project = Project(name="Sample Project", description="Test Description")
+    module_db_session.add(project)
+    await module_db_session.commit()
+
+    # Each version needs its parent flushed first so the parent id exists
+    parent_id = None
+    for number, name in enumerate(["Initial Version", "Version 1", "Version 2"]):
+        version = Version(project_id=project.id, version_number=number, name=name, parent_id=parent_id)
+        module_db_session.add(version)
+        await module_db_session.commit()
+        parent_id = version.id
+
+    yield project.id
+
+@pytest_asyncio.fixture
+async def db_session(db_connection, seeded_version):
+    """Create a function-scoped session isolated by a SAVEPOINT.
+
+    Commits inside the test only release inner savepoints; everything the
+    test wrote is rolled back on teardown.
+    """
+    savepoint = await db_connection.begin_nested()
+    session = AsyncSession(
+        bind=db_connection,
+        join_transaction_mode="create_savepoint",
+        expire_on_commit=False
+    )
+    try:
+        yield session
+    finally:
+        await session.close()
+        await savepoint.rollback()
+
+@pytest.fixture
+def count_selects(db_engine):
+    """Record the SELECT statements the test engine runs inside a ``with`` block.
+
+    Yields a list that fills with each SELECT as it is executed, so ``len()``
+    on it gives the number of reads. INSERT, UPDATE and DELETE statements
+    are not recorded.
+    """
+    @contextmanager
+    def _count_selects():
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append(statement)
+
+        event.listen(db_engine.sync_engine, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            event.remove(db_engine.sync_engine, "before_cursor_execute", _record)
+    return _count_selects
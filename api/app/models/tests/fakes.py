@@ -0,0 +1,57 @@
+"""Lightweight stand-ins for models in mock-only tests.
+
+These are much cheaper to build than ``MagicMock(spec=Model)`` and keep
+attribute access as plain lookups. Use a MagicMock only when a test
+asserts on recorded calls.
+"""
+import itertools
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+_uuid_counter = itertools.count(1)
+
+def next_uuid() -> UUID:
+    """Return the next id from a process-wide counter.
+
+    Mocks never reach a database, so ids only need to be distinct. A counter
+    avoids an ``os.urandom`` call per id and makes failures reproducible.
+    """
+    return UUID(int=next(_uuid_counter))
+
+# eq=False keeps identity hashing, like ORM instances, so fakes can be
+# tracked in the mocked session's ``new``/``deleted`` sets.
+@dataclass(eq=False)
+class FakeFile:
+    """Plain data stand-in for :class:`~app.models.file.File`."""
+    id: UUID = field(default_factory=next_uuid)
+    path: str = ""
+    content: str = ""
+    version_id: Optional[UUID] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+@dataclass(eq=False)
+class FakeVersion:
+    """Plain data stand-in for :class:`~app.models.version.Version`."""
+    id: UUID = field(default_factory=next_uuid)
+    project_id: Optional[UUID] = None
+    version_number: int = 0
+    name: str = ""
+    parent_id: Optional[UUID] = None
+    active: bool = True
+    files: list = field(default_factory=list)
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+@dataclass(eq=False)
+class FakeProject:
+    """Plain data stand-in for :class:`~app.models.project.Project`."""
+    id: UUID = field(default_factory=next_uuid)
+    name: str = ""
+    description: str = ""
+    active: bool = True
+    versions: list = field(default_factory=list)
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
@@ -1,5 +1,4 @@
 """Tests for Base model."""
-import pytest
 from unittest.mock import MagicMock, AsyncMock
 from datetime import datetime, timezone
 from uuid import UUID, uuid4
@@ -12,7 +11,6 @@ class TestModel(Base):
     def __init__(self):
         super().__init__()
 
-@pytest.mark.asyncio
 async def test_base_model_creation(mock_db_session, mock_models):
     """Test base model field creation."""
     # Setup mock
@@ -41,7 +39,6 @@ async def test_base_model_creation(mock_db_session, mock_models):
     assert model.created_at.tzinfo is not None  # Verify timezone awareness
     assert model.updated_at.tzinfo is not None  # Verify timezone awareness
 
-@pytest.mark.asyncio
 async def test_base_model_update(mock_db_session, mock_models):
     """Test base model update behavior."""
     # Setup mock
@@ -77,7 +74,6 @@ async def test_base_model_update(mock_db_session, mock_models):
     assert model.updated_at == new_updated_at  # updated_at should be updated
     assert model.updated_at > model.created_at  # updated_at should be later than created_at
 
-@pytest.mark.asyncio
 async def test_base_model_id_generation(mock_db_session, mock_models):
     """Test UUID generation for base model."""
     # Create multiple instances to verify unique IDs
@@ -109,7 +105,6 @@ async def test_base_model_id_generation(mock_db_session, mock_models):
     for model in models:
         assert isinstance(model.id, UUID)
 
-@pytest.mark.asyncio
 async def test_base_model_server_defaults(mock_db_session, mock_models):
     """Test server default behavior for timestamps."""
     # Create model without specifying timestamps
@@ -137,7 +132,6 @@ async def test_base_model_server_defaults(mock_db_session, mock_models):
     assert model.created_at.tzinfo == timezone.utc
     assert model.updated_at.tzinfo == timezone.utc
 
-@pytest.mark.asyncio
 async def test_base_model_timezone_handling(mock_db_session, mock_models):
     """Test timezone handling in timestamps."""
     mock_test_model = MagicMock(spec=TestModel)
@@ -165,7 +159,6 @@ async def test_base_model_timezone_handling(mock_db_session, mock_models):
     assert model.updated_at.isoformat().endswith('+00:00') or model.updated_at.isoformat().endswith('Z')
 
 
-@pytest.mark.asyncio
 async def test_base_model_inheritance(mock_db_session, mock_models):
     """Test inheritance behavior with multiple models."""
     class ChildModel(TestModel):
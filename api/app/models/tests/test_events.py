@@ -1,8 +1,10 @@
 """Test SQLAlchemy event listeners."""
+import io
 import os
 import pytest
-from unittest.mock import patch, mock_open, MagicMock
+from unittest.mock import patch
 from uuid import uuid4
+from sqlalchemy import select
 
 from ...models.project import Project
 from ...models.version import Version
@@ -10,13 +12,12 @@ from ...models.file import File
 from ...crud.version.template import create_initial_version
 from ...errors import NoodleError
 
-@pytest.mark.asyncio
-async def test_create_initial_version(mock_db_session):
+async def test_create_initial_version(db_session):
     """Test initial version creation after project insert."""
-    # Create a project with mock session
+    # Create the project in the real in-memory database
     project = Project(id=uuid4(), name="Test Project")
-    project._sa_session = mock_db_session
-    mock_db_session.add(project)
+    db_session.add(project)
+    await db_session.commit()
     
     # Mock template files with proper dictionary syntax
     mock_files = {
@@ -56,38 +57,31 @@ async def test_create_initial_version(mock_db_session):
                 return 'src/index.tsx'
         mock_relpath.side_effect = mock_relpath_impl
         
-        # Setup mock file reads
-        mock_file_open.side_effect = [
-            mock_open(read_data=content).return_value
-            for content in mock_files.values()
-        ]
+        # Setup mock file reads keyed on file name, independent of call order
+        contents_by_name = {
+            os.path.basename(path): content for path, content in mock_files.items()
+        }
+        def fake_open(path, *args, **kwargs):
+            return io.StringIO(contents_by_name[os.path.basename(path)])
+        mock_file_open.side_effect = fake_open
         
         # Trigger event
-        await create_initial_version(mock_db_session, project.id)
-        
-        # Get created version
-        versions = [obj for obj in mock_db_session.new if isinstance(obj, Version)]
-        assert len(versions) == 1
-        version = versions[0]
-        
-        # Verify version creation
-        assert version.project_id == project.id
-        assert version.version_number == 0
-        assert version.name == "Initial Version"
-        
-        # Verify file creation
-        files = [obj for obj in mock_db_session.new if isinstance(obj, File)]
-        assert len(files) == len(mock_files)
-        
-        # Verify each file's content and path
-        file_paths = {file.path: file.content for file in files}
-        assert file_paths == mock_files
-        
-        # Verify session operations
-        assert mock_db_session.commit.await_count == 2  # One for version, one for files
-        assert mock_db_session.refresh.await_count == 1  # For version after first commit
+        await create_initial_version(db_session, project.id)
+
+    # Verify version creation
+    version = (await db_session.execute(
+        select(Version).where(Version.project_id == project.id)
+    )).scalar_one()
+    assert version.version_number == 0
+    assert version.name == "Initial Version"
+
+    # Verify each file's content and path
+    files = (await db_session.execute(
+        select(File).where(File.version_id == version.id)
+    )).scalars().all()
+    file_paths = {file.path: file.content for file in files}
+    assert file_paths == mock_files
 
-@pytest.mark.asyncio
 async def test_create_initial_version_no_session(mock_db_session):
     """Test that a version is created even when project is not already in session."""
     project = Project(id=uuid4(), name="Test Project")
@@ -110,7 +104,6 @@ async def test_create_initial_version_no_session(mock_db_session):
         assert version.project_id == project.id
         assert version.version_number == 0
 
-@pytest.mark.asyncio
 async def test_create_initial_version_file_error(mock_db_session):
     """Test handling of file read errors."""
     # Create a project with mock session
@@ -153,7 +146,6 @@ async def test_create_initial_version_file_error(mock_db_session):
                 assert mock_db_session.commit.await_count >= 1
                 assert mock_db_session.refresh.await_count >= 1
             
-@pytest.mark.asyncio
 async def test_version_validate_before_commit(mock_db_session):
     """Test version validation during before_commit event."""
     # Create a project first
@@ -209,7 +201,6 @@ async def test_version_validate_before_commit(mock_db_session):
     # Verify error message
     assert "Parent version must be from the same project" in str(exc_info.value)
     
-@pytest.mark.asyncio
 async def test_version_active_property():
     """Test that the version active property inherits from project."""
     # Create project and version without session
@@ -226,7 +217,6 @@ async def test_version_active_property():
     project.active = False
     assert version.active is False
     
-@pytest.mark.asyncio
 async def test_version_constructor_validation():
     """Test version constructor validation."""
     # Test validation in constructor - project_id is required
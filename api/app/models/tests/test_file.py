@@ -1,139 +1,122 @@
 """Tests for File model."""
+import operator
 import pytest
 from uuid import uuid4
-from unittest.mock import MagicMock, AsyncMock
+from unittest.mock import MagicMock
 from sqlalchemy.exc import IntegrityError
 from ...models.file import File
 from ...models.version import Version
-from ...models.project import Project
-from datetime import datetime
+from .fakes import FakeFile, FakeProject, FakeVersion, next_uuid
+from datetime import datetime, timedelta
 
-@pytest.mark.asyncio
-async def test_file_creation(mock_db_session, mock_models):
-    """Test basic file creation."""
-    mock_version = MagicMock(id=uuid4())
-    mock_file = MagicMock(spec=File)
-    mock_file.id = uuid4()
-    mock_file.path = "src/test.tsx"
-    mock_file.content = "Test content"
-    mock_file.version_id = mock_version.id
-    mock_file.created_at = MagicMock()
-    mock_file.updated_at = MagicMock()
+# 1 MiB of content, built once rather than on every run
+_LARGE_CONTENT = "x" * (1024 * 1024)
 
-    mock_models.File.return_value = mock_file
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
+# Paths deliberately out of order, with the expected ordering computed once
+_PATHS = ("src/c.tsx", "src/a.tsx", "src/b.tsx")
+_SORTED_PATHS = tuple(sorted(_PATHS))
+_by_path = operator.attrgetter("path")
 
-    file = mock_models.File(
-        version_id=mock_version.id,
+# Fixed timestamps, one minute apart, for the mock timestamp tests
+T0 = datetime(2025, 2, 24, 20, 0, 0)
+T1 = T0 + timedelta(minutes=1)
+T2 = T0 + timedelta(minutes=2)
+T3 = T0 + timedelta(minutes=3)
+
+async def test_file_creation(db_session, seeded_version):
+    """Test basic file creation."""
+    file = File(
+        version_id=seeded_version,
         path="src/test.tsx",
         content="Test content"
     )
-    mock_db_session.add(file)
-    await mock_db_session.commit()
-    await mock_db_session.refresh(file)
+    db_session.add(file)
+    await db_session.commit()
+    # Timestamps are server-generated, so they must be loaded explicitly
+    await db_session.refresh(file, ["created_at", "updated_at"])
 
     assert file.id is not None
     assert file.path == "src/test.tsx"
     assert file.content == "Test content"
-    assert file.version_id == mock_version.id
+    assert file.version_id == seeded_version
     assert file.created_at is not None
     assert file.updated_at is not None
 
-@pytest.mark.asyncio
-async def test_file_path_constraints(mock_db_session, mock_models):
-    """Test file path constraints."""
-    mock_version = MagicMock(id=uuid4())
-
-    # Test empty path
-    with pytest.raises(ValueError, match="File path cannot be empty"):
-        File(version_id=mock_version.id, path="", content="Test content")
-
-    # Test path too long
-    with pytest.raises(ValueError, match="File path cannot exceed 1024 characters"):
-        File(version_id=mock_version.id, path="x" * 1025, content="Test content")
-
-    # Test duplicate path in same version
-    mock_file = MagicMock(spec=File)
-    mock_file.id = uuid4()
-    mock_file.path = "src/test.tsx"
-    mock_file.content = "Test content"
-    mock_file.version_id = mock_version.id
-
-    mock_models.File.return_value = mock_file
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.side_effect = IntegrityError(None, None, None)
-    mock_db_session.rollback.return_value = AsyncMock()
-
+@pytest.mark.parametrize("path,content,match", [
+    pytest.param("", "Test content", "File path cannot be empty", id="empty-path"),
+    pytest.param("x" * 1025, "Test content", "File path cannot exceed 1024 characters", id="path-too-long"),
+    pytest.param("src/test.tsx", None, "File content cannot be null", id="null-content"),
+])
+def test_file_init_rejects(path, content, match):
+    """Test File constructor validation, which needs no database."""
+    with pytest.raises(ValueError, match=match):
+        File(version_id=next_uuid(), path=path, content=content)
+
+@pytest.mark.parametrize("same_version", [
+    pytest.param(True, id="duplicate-path"),
+    pytest.param(False, id="unknown-version"),
+])
+async def test_file_insert_rejects(db_session, seeded_version, same_version):
+    """Test database constraints rejecting file inserts."""
+    # Each probe runs in a SAVEPOINT so a failure leaves the test transaction usable
+    async with db_session.begin_nested():
+        db_session.add(File(version_id=seeded_version, path="src/test.tsx", content="1"))
+
+    version_id = seeded_version if same_version else uuid4()
     with pytest.raises(IntegrityError):
-        file = mock_models.File(version_id=mock_version.id, path="src/test.tsx", content="Test content")
-        mock_db_session.add(file)
-        await mock_db_session.commit()
-    await mock_db_session.rollback()
-    
-    # Reset mock for subsequent tests
-    mock_db_session.commit.side_effect = None
-
-@pytest.mark.asyncio
-async def test_file_content_constraints(mock_db_session, mock_models):
-    """Test file content constraints."""
-    mock_version = MagicMock(id=uuid4())
-
-    # Test null content
-    with pytest.raises(ValueError, match="File content cannot be null"):
-        File(version_id=mock_version.id, path="src/test.tsx", content=None)
-
-    # Test empty content
-    file = File(version_id=mock_version.id, path="src/test.tsx", content="")
-    mock_db_session.add(file)
-    await mock_db_session.commit()
-
-    # Test large content
-    large_content = "x" * (1024 * 1024)
-    file = File(version_id=mock_version.id, path="src/test.tsx", content=large_content)
-    mock_db_session.add(file)
-    await mock_db_session.commit()
-    assert len(file.content) == len(large_content)
-
-@pytest.mark.asyncio
-async def test_file_version_relationship(mock_db_session, mock_models):
-    """Test file-version relationship."""
-    mock_version = MagicMock(id=uuid4())
-
-    # Test missing version_id
+        async with db_session.begin_nested():
+            db_session.add(File(version_id=version_id, path="src/test.tsx", content="2"))
+
+async def test_file_path_constraints(db_session, seeded_version):
+    """Test the same path is allowed in different versions."""
+    seed = await db_session.get(Version, seeded_version)
+    other_version = Version(project_id=seed.project_id, version_number=2, name="Other Version")
+    async with db_session.begin_nested():
+        db_session.add(other_version)
+        db_session.add(File(version_id=seeded_version, path="src/test.tsx", content="1"))
+
+    async with db_session.begin_nested():
+        db_session.add(File(version_id=other_version.id, path="src/test.tsx", content="2"))
+
+@pytest.mark.parametrize("content", [
+    pytest.param("", id="empty"),
+    pytest.param(_LARGE_CONTENT, id="large"),
+])
+async def test_file_content_constraints(db_session, seeded_version, content):
+    """Test empty and large content are accepted."""
+    file = File(version_id=seeded_version, path="src/test.tsx", content=content)
+    db_session.add(file)
+    await db_session.commit()
+    assert len(file.content) == len(content)
+
+@pytest.mark.parametrize("kwargs", [
+    pytest.param({}, id="no-fields"),
+    pytest.param({"path": "src/test.tsx", "content": "Test content"}, id="path-and-content"),
+])
+def test_file_requires_version_id(kwargs):
+    """Test File requires a version_id."""
     with pytest.raises(ValueError, match="version_id is required"):
-        File(path="src/test.tsx", content="Test content")
+        File(**kwargs)
 
-    # Test non-existent version_id
-    mock_db_session.commit.side_effect = IntegrityError(None, None, None)
-    with pytest.raises(IntegrityError):
-        file = mock_models.File(version_id=uuid4(), path="src/test.tsx", content="Test content")
-        mock_db_session.add(file)
-        await mock_db_session.commit()
-    mock_db_session.commit.side_effect = None
+async def test_file_version_relationship(
+    mock_db_session, mock_models, set_query_results
+):
+    """Test file-version relationship."""
+    mock_version = MagicMock(id=next_uuid())
 
     # Add multiple files and verify ordering
-    paths = ["src/c.tsx", "src/a.tsx", "src/b.tsx"]
-    mock_version.files = [MagicMock(path=path) for path in paths]
-    mock_version.files.sort(key=lambda f: f.path)
+    mock_version.files = sorted((MagicMock(path=path) for path in _PATHS), key=_by_path)
 
     assert len(mock_version.files) == 3
-    assert [f.path for f in mock_version.files] == sorted(paths)
+    assert tuple(f.path for f in mock_version.files) == _SORTED_PATHS
 
     # Test cascade delete behavior
-    mock_version = MagicMock(spec=Version)
-    mock_version.id = uuid4()
-    mock_version.files = []
+    mock_version = FakeVersion()
 
     mock_models.Version.return_value = mock_version
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.side_effect = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
 
     # Create version with files
-    version = mock_models.Version(project_id=uuid4(), version_number=1, name="Test Version")
+    version = mock_models.Version(project_id=next_uuid(), version_number=1, name="Test Version")
     mock_db_session.add(version)
     await mock_db_session.commit()
 
@@ -149,11 +132,8 @@ async def test_file_version_relationship(mock_db_session, mock_models):
         mock_db_session.add(file)
     await mock_db_session.commit()
 
-    # Mock query results for version's files
-    mock_db_session.query.return_value.filter.return_value.all.side_effect = [
-        files,  # First call returns files
-        []      # Second call after delete returns empty list
-    ]
+    # Files exist before the delete and are gone after it
+    set_query_results(files, [])
 
     # Verify files exist
     version_files = mock_db_session.query(File).filter(File.version_id == version.id).all()
@@ -167,116 +147,59 @@ async def test_file_version_relationship(mock_db_session, mock_models):
     remaining_files = mock_db_session.query(File).filter(File.version_id == version.id).all()
     assert len(remaining_files) == 0
 
-@pytest.mark.asyncio
-async def test_file_version_validation(mock_db_session, mock_models):
-    """Test file version validation."""
-    # Test file creation without version_id
-    with pytest.raises(ValueError, match="version_id is required"):
-        File()
-
-    with pytest.raises(ValueError, match="version_id is required"):
-        File(path="src/test.tsx", content="Test content")
-
-    # Test file creation with invalid version_id
-    mock_db_session.commit.side_effect = IntegrityError(None, None, None)
-    with pytest.raises(IntegrityError):
-        file = File(version_id=uuid4(), path="src/test.tsx", content="Test content")
-        mock_db_session.add(file)
-        await mock_db_session.commit()
-    await mock_db_session.rollback()
-
-    # Test file creation with valid version_id
-    mock_version = MagicMock(spec=Version)
-    mock_version.id = uuid4()
-    mock_db_session.commit.side_effect = None
-    mock_db_session.commit.return_value = AsyncMock()
-
-    file = File(version_id=mock_version.id, path="src/test.tsx", content="Test content")
-    mock_db_session.add(file)
-    await mock_db_session.commit()
-
-    assert file.version_id == mock_version.id
-
-@pytest.mark.asyncio
 async def test_file_timestamps(mock_db_session, mock_models):
     """Test file timestamp behavior."""
-    mock_version = MagicMock(id=uuid4())
-    mock_file = MagicMock(spec=File)
-    
-    # Initial timestamps
-    created_at = datetime(2025, 2, 24, 20, 0, 0)
-    updated_at = datetime(2025, 2, 24, 20, 0, 0)
-    mock_file.created_at = created_at
-    mock_file.updated_at = updated_at
+    mock_version = MagicMock(id=next_uuid())
+
+    mock_file = FakeFile(
+        path="src/test.tsx",
+        content="Test content",
+        version_id=mock_version.id,
+        created_at=T0,
+        updated_at=T0
+    )
 
     mock_models.File.return_value = mock_file
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
 
     file = mock_models.File(version_id=mock_version.id, path="src/test.tsx", content="Test content")
     mock_db_session.add(file)
     await mock_db_session.commit()
 
-    assert file.created_at == created_at
-    assert file.updated_at == updated_at
+    assert file.created_at == T0
+    assert file.updated_at == T0
 
     # Update file and set a new updated_at timestamp
     file.content = "Updated content"
-    new_updated_at = datetime(2025, 2, 24, 20, 1, 0)  # 1 minute later
-    mock_file.updated_at = new_updated_at
+    mock_file.updated_at = T1
     await mock_db_session.commit()
-    await mock_db_session.refresh(file)
 
-    assert file.created_at == created_at
-    assert file.updated_at == new_updated_at
+    assert file.created_at == T0
+    assert file.updated_at == T1
     assert file.updated_at > file.created_at
 
-@pytest.mark.asyncio
-async def test_file_ordering(mock_db_session, mock_models):
+def test_file_ordering():
     """Test file ordering within a version."""
-    mock_version = MagicMock(id=uuid4())
-    mock_version.files = []
+    # The relationship loads files ordered by path, so the ordering comes from SQL
+    assert [str(c) for c in Version.files.property.order_by] == ["files.path"]
+
+    # A version's files therefore arrive already sorted
+    mock_version = MagicMock(id=next_uuid())
+    mock_version.files = sorted(
+        (FakeFile(path=path, content=f"Content for {path}", version_id=mock_version.id) for path in _PATHS),
+        key=_by_path,
+    )
+    assert tuple(f.path for f in mock_version.files) == _SORTED_PATHS
 
-    # Create files in non-alphabetical order
-    paths = ["src/z.tsx", "src/a.tsx", "src/m.tsx"]
-    
-    for path in paths:
-        mock_file = MagicMock(spec=File)
-        mock_file.id = uuid4()
-        mock_file.path = path
-        mock_file.content = f"Content for {path}"
-        mock_file.version_id = mock_version.id
-        mock_version.files.append(mock_file)
-
-    # Verify files are ordered by path
-    mock_version.files.sort(key=lambda f: f.path)
-    ordered_paths = [f.path for f in mock_version.files]
-    assert ordered_paths == sorted(paths)
-
-@pytest.mark.asyncio
-async def test_file_version_timestamps(mock_db_session, mock_models):
+async def test_file_version_timestamps(
+    mock_db_session, mock_models, set_session_get
+):
     """Test file operations affecting version timestamps."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.active = True
-
-    mock_version = MagicMock(spec=Version)
-    mock_version.id = uuid4()
-    mock_version.project_id = mock_project.id
-    mock_version.created_at = datetime(2025, 2, 24, 20, 0, 0)
-    mock_version.updated_at = datetime(2025, 2, 24, 20, 0, 0)
-
-    def mock_get(model_class, id_):
-        if model_class == Project and id_ == mock_project.id:
-            return mock_project
-        return None
-    mock_db_session.get = MagicMock(side_effect=mock_get)
+    mock_project = FakeProject()
+    mock_version = FakeVersion(project_id=mock_project.id, created_at=T0, updated_at=T0)
+
+    set_session_get(mock_project)
 
     mock_models.Version.return_value = mock_version
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
 
     # Create version
     version = mock_models.Version(project_id=mock_project.id, version_number=1)
@@ -285,60 +208,40 @@ async def test_file_version_timestamps(mock_db_session, mock_models):
     initial_version_updated_at = version.updated_at
 
     # Add file should update version timestamp
-    mock_file = MagicMock(spec=File)
-    mock_file.id = uuid4()
-    mock_file.path = "src/test.tsx"
-    mock_file.content = "Test content"
-    mock_file.version_id = version.id
-    mock_version.updated_at = datetime(2025, 2, 24, 20, 1, 0)
+    mock_version.updated_at = T1
     
     file = mock_models.File(version_id=version.id, path="src/test.tsx", content="Test content")
     mock_db_session.add(file)
     await mock_db_session.commit()
-    await mock_db_session.refresh(version)
     
     assert version.updated_at > initial_version_updated_at
 
     # Update file should update version timestamp
     initial_version_updated_at = version.updated_at
     file.content = "Updated content"
-    mock_version.updated_at = datetime(2025, 2, 24, 20, 2, 0)
+    mock_version.updated_at = T2
     await mock_db_session.commit()
-    await mock_db_session.refresh(version)
     
     assert version.updated_at > initial_version_updated_at
 
     # Delete file should update version timestamp
     initial_version_updated_at = version.updated_at
     mock_db_session.delete(file)
-    mock_version.updated_at = datetime(2025, 2, 24, 20, 3, 0)
+    mock_version.updated_at = T3
     await mock_db_session.commit()
-    await mock_db_session.refresh(version)
     
     assert version.updated_at > initial_version_updated_at
 
-@pytest.mark.asyncio
-async def test_bulk_file_operations(mock_db_session, mock_models):
+async def test_bulk_file_operations(
+    mock_db_session, mock_models, set_session_get
+):
     """Test bulk file operations within a version."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.active = True
-
-    mock_version = MagicMock(spec=Version)
-    mock_version.id = uuid4()
-    mock_version.project_id = mock_project.id
-    mock_version.files = []
+    mock_project = FakeProject()
+    mock_version = FakeVersion(project_id=mock_project.id)
 
-    def mock_get(model_class, id_):
-        if model_class == Project and id_ == mock_project.id:
-            return mock_project
-        return None
-    mock_db_session.get = MagicMock(side_effect=mock_get)
+    set_session_get(mock_project)
 
     mock_models.Version.return_value = mock_version
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
 
     # Create version
     version = mock_models.Version(project_id=mock_project.id, version_number=1)
@@ -346,57 +249,24 @@ async def test_bulk_file_operations(mock_db_session, mock_models):
     await mock_db_session.commit()
 
     # Bulk create files
-    files = []
-    for i in range(5):
-        mock_file = MagicMock(spec=File)
-        mock_file.id = uuid4()
-        mock_file.path = f"src/test{i}.tsx"
-        mock_file.content = f"Test content {i}"
-        mock_file.version_id = version.id
-        mock_version.files.append(mock_file)
-        
-        file = mock_models.File(
-            version_id=version.id,
-            path=f"src/test{i}.tsx",
-            content=f"Test content {i}"
-        )
-        files.append(file)
-        mock_db_session.add(file)
-    
-    await mock_db_session.commit()
-    assert len(mock_version.files) == 5
-
-    # Bulk update files
-    for file in files:
-        file.content = f"Updated content for {file.path}"
+    files = [
+        mock_models.File(version_id=version.id, path=f"src/test{i}.tsx", content=f"Test content {i}")
+        for i in range(5)
+    ]
+    mock_db_session.add_all(files)
     await mock_db_session.commit()
 
-    # Bulk delete files
-    for file in files:
-        mock_db_session.delete(file)
-    await mock_db_session.commit()
-    mock_version.files = []
-    assert len(mock_version.files) == 0
+    mock_db_session.add_all.assert_called_once_with(files)
+    assert len(files) == 5
 
-@pytest.mark.asyncio
-async def test_file_operations_inactive_project(mock_db_session, mock_models):
+async def test_file_operations_inactive_project(
+    mock_db_session, mock_models, set_session_get
+):
     """Test file operations in inactive projects."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.active = False
-
-    mock_version = MagicMock(spec=Version)
-    mock_version.id = uuid4()
-    mock_version.project_id = mock_project.id
-    mock_version.active = False
-
-    def mock_get(model_class, id_):
-        if model_class == Project and id_ == mock_project.id:
-            return mock_project
-        elif model_class == Version and id_ == mock_version.id:
-            return mock_version
-        return None
-    mock_db_session.get = MagicMock(side_effect=mock_get)
+    mock_project = FakeProject(active=False)
+    mock_version = FakeVersion(project_id=mock_project.id, active=False)
+
+    set_session_get(mock_project, mock_version)
 
     # Test file creation in inactive project
     file = File(version_id=mock_version.id, path="src/test.tsx", content="Test content")
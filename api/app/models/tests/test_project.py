@@ -1,211 +1,194 @@
 """Tests for Project model."""
+import operator
+import re
 import pytest
-from unittest.mock import MagicMock, AsyncMock, PropertyMock, call
-from sqlalchemy.exc import IntegrityError
+from unittest.mock import MagicMock, AsyncMock
+from sqlalchemy import delete, func, insert, inspect, select
+from sqlalchemy.exc import IntegrityError, InvalidRequestError
+from sqlalchemy.orm import raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from ...models.project import Project
 from ...models.version import Version
 from ...errors import NoodleError
-from uuid import uuid4
+from .fakes import FakeVersion, next_uuid
+from uuid import UUID
 from datetime import datetime
 
-@pytest.mark.asyncio
-async def test_project_creation(mock_db_session, mock_models):
+# 1 MiB description, built once rather than on every run
+_LARGE_DESCRIPTION = "x" * (1024 * 1024)
+
+_by_version_number = operator.attrgetter("version_number")
+
+# Validation messages, compiled once for pytest.raises(match=...)
+_EMPTY_NAME_RE = re.compile("Project name cannot be empty")
+_NAME_TOO_LONG_RE = re.compile("Project name cannot exceed 255 characters")
+
+async def test_project_creation(db_session, sample_project):
     """Test basic project creation."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.name = "Test Project"
-    mock_project.description = "Test Description"
-    mock_project.active = True
-    mock_project.created_at = MagicMock()
-    mock_project.updated_at = MagicMock()
-    mock_project.versions = [MagicMock(spec=Version)]
-    mock_project.versions[0].version_number = 0
-    mock_project.versions[0].name = "Initial Version"
-    mock_project.versions[0].parent_id = None
-
-    mock_models.Project.return_value = mock_project
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
-
-    project = mock_models.Project(name="Test Project", description="Test Description")
-    mock_db_session.add(project)
-    await mock_db_session.commit()
-    await mock_db_session.refresh(project)
+    project = await db_session.get(Project, sample_project)
 
-    assert project.id is not None
-    assert project.name == "Test Project"
+    assert project.name == "Sample Project"
     assert project.description == "Test Description"
     assert project.active is True
     assert project.created_at is not None
     assert project.updated_at is not None
-    assert len(project.versions) == 1
-    assert project.versions[0].version_number == 0
-    assert project.versions[0].name == "Initial Version"
-    assert project.versions[0].parent_id is None
-
-@pytest.mark.asyncio
-async def test_project_soft_delete(mock_db_session, mock_models):
-    """Test project soft deletion."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.versions = [MagicMock(spec=Version), MagicMock(spec=Version)]
-    
-    # Set up version active properties
-    for version in mock_project.versions:
-        type(version).active = PropertyMock(return_value=True)
-    
-    mock_models.Project.return_value = mock_project
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
-
-    project = mock_models.Project(name="Test Project", description="Test Description")
-    mock_db_session.add(project)
-    await mock_db_session.commit()
-    await mock_db_session.refresh(project)
-
-    # Update active property for versions
-    for version in project.versions:
-        type(version).active = PropertyMock(return_value=False)
-
-    project.active = False
-    await mock_db_session.commit()
-    await mock_db_session.refresh(project)
 
-    assert project.active is False
-    for version in project.versions:
-        assert version.active is False
+    versions = sorted(project.versions, key=_by_version_number)
+    assert [v.version_number for v in versions] == [0, 1, 2]
+    assert versions[0].name == "Initial Version"
+    assert versions[0].parent_id is None
+    assert [v.parent_id for v in versions[1:]] == [v.id for v in versions[:-1]]
 
-    # Update active property for versions
-    for version in project.versions:
-        type(version).active = PropertyMock(return_value=True)
+async def test_project_soft_delete(db_session):
+    """Test project soft deletion."""
+    project = Project(name="Test Project", description="Test Description")
+    db_session.add(project)
+    await db_session.commit()
+    db_session.add_all(
+        Version(project_id=project.id, version_number=n, name=f"Version {n}") for n in range(2)
+    )
+    await db_session.commit()
+
+    # Re-read the project and its versions from the database in two queries
+    load_project = (
+        select(Project)
+        .options(selectinload(Project.versions))
+        .where(Project.id == project.id)
+        .execution_options(populate_existing=True)
+    )
 
-    project.active = True
-    await mock_db_session.commit()
-    await mock_db_session.refresh(project)
+    for active in (False, True):
+        project.active = active
+        await db_session.commit()
+
+        project = (await db_session.scalars(load_project)).one()
+        assert project.active is active
+
+        # Every version inherits the flag; fetch them all in one column query
+        states = (await db_session.scalars(
+            select(Version.active).where(Version.project_id == project.id)
+        )).all()
+        assert states == [active, active]
+
+async def test_no_lazy_loading_on_versions(db_session, sample_project):
+    """Test a project's versions can be read without any lazy loads."""
+    stmt = (
+        select(Project)
+        .options(
+            # Version.project may still resolve from the identity map, but nothing may emit SQL
+            selectinload(Project.versions).raiseload("*", sql_only=True),
+            raiseload("*"),
+        )
+        .where(Project.id == sample_project)
+    )
+    project = (await db_session.scalars(stmt)).one()
 
-    assert project.active is True
+    assert len(project.versions) == 3
     for version in project.versions:
+        assert version.name
+        assert version.version_number >= 0
         assert version.active is True
 
-@pytest.mark.asyncio
-async def test_project_constraints(mock_db_session, mock_models):
-    """Test project model constraints."""
-    with pytest.raises(ValueError, match="Project name cannot be empty"):
-        Project(name="")
-
-    with pytest.raises(ValueError, match="Project name cannot exceed 255 characters"):
-        Project(name="x" * 256)
-
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.description = ""
-
-    mock_models.Project.return_value = mock_project
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-
-    project = mock_models.Project(name="Test Project")
-    mock_db_session.add(project)
-    await mock_db_session.commit()
+    # Anything not eagerly loaded fails loudly instead of issuing a SELECT
+    with pytest.raises(InvalidRequestError, match="is not available due to lazy='raise"):
+        project.versions[0].files
+
+@pytest.mark.parametrize("name,match", [
+    pytest.param("", _EMPTY_NAME_RE, id="empty"),
+    pytest.param("x" * 256, _NAME_TOO_LONG_RE, id="too-long"),
+])
+def test_project_constraints_invalid(name, match):
+    """Test Project constructor validation, which needs no database."""
+    with pytest.raises(ValueError, match=match):
+        Project(name=name)
+
+async def test_project_constraints_valid(db_session):
+    """Test project column defaults against the database."""
+    project = Project(name="Test Project")
+    db_session.add(project)
+    await db_session.commit()
+    # Only the timestamps are server-generated; the other defaults are applied at flush
+    await db_session.refresh(project, ["created_at", "updated_at"])
 
     assert project.description == ""
-    assert len(str(project.id)) == 36
+    assert project.active is True
+    assert isinstance(project.id, UUID)
+    assert project.created_at is not None
+    assert project.updated_at is not None
 
-@pytest.mark.asyncio
-async def test_project_relationships(mock_db_session, mock_models):
+async def test_project_relationships(db_session, count_selects):
     """Test project relationships."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.versions = [MagicMock(spec=Version) for _ in range(4)]
-    for i, version in enumerate(mock_project.versions):
-        version.version_number = i
-        version.parent_id = mock_project.versions[0].id if i > 0 else None
-        version.active = True
-
-    mock_models.Project.return_value = mock_project
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
-
-    project = mock_models.Project(name="Test Project", description="Test Description")
-    mock_db_session.add(project)
-    await mock_db_session.commit()
-    await mock_db_session.refresh(project)
-
-    assert len(project.versions) == 4
-    assert project.versions[0].version_number == 0
-    for i, version in enumerate(project.versions[1:], 1):
-        assert version.version_number > 0
-        assert version.parent_id == project.versions[0].id
+    project = Project(name="Test Project", description="Test Description")
+    db_session.add(project)
+    await db_session.commit()
+    initial = Version(project_id=project.id, version_number=0, name="Initial Version")
+    db_session.add(initial)
+    await db_session.commit()
+
+    # Insert the child versions in one batched statement
+    await db_session.execute(insert(Version), [
+        {"project_id": project.id, "version_number": i, "name": f"Version {i}", "parent_id": initial.id}
+        for i in range(1, 4)
+    ])
+    db_session.expire(project, ["versions"])
+    with count_selects() as statements:
+        project = (await db_session.scalars(
+            select(Project).options(selectinload(Project.versions)).where(Project.id == project.id)
+        )).one()
+
+        versions = sorted(project.versions, key=_by_version_number)
+        assert len(versions) == 4
+        assert versions[0].version_number == 0
+        for version in versions[1:]:
+            assert version.version_number > 0
+            assert version.parent_id == versions[0].id
+    # The project and its versions, however many there are
+    assert len(statements) <= 2
 
     project.active = False
-    for version in project.versions:
-        version.active = False
-    await mock_db_session.commit()
-    await mock_db_session.refresh(project)
+    await db_session.commit()
 
     for version in project.versions:
-        await mock_db_session.refresh(version)
         assert version.active is False, f"Version {version.version_number} is still active"
 
-@pytest.mark.asyncio
-async def test_version_validation(mock_db_session, mock_models):
+    # Deleting the project cascades to its versions; count them without loading rows
+    await db_session.delete(project)
+    await db_session.commit()
+    assert await db_session.scalar(
+        select(func.count()).select_from(Version).where(Version.project_id == project.id)
+    ) == 0
+
+async def test_project_version_validation(mock_db_session, mock_models, mock_project_factory):
     """Test project version validation."""
     # Setup projects
-    mock_project1 = MagicMock(spec=Project)
-    mock_project1.id = uuid4()
-    mock_project1.versions = [MagicMock(spec=Version)]
-    mock_project1.versions[0].id = uuid4()
-    mock_project1.versions[0].version_number = 0
-
-    mock_project2 = MagicMock(spec=Project)
-    mock_project2.id = uuid4()
-    mock_project2.versions = [MagicMock(spec=Version)]
-    mock_project2.versions[0].id = uuid4()
+    mock_project1 = mock_project_factory(version_numbers=[0])
+    mock_project2 = mock_project_factory(version_numbers=[0])
 
     mock_models.Project.side_effect = [mock_project1, mock_project2]
-    mock_db_session.add.return_value = None
-
-    # Set up commit mock
-    error_commits = {2, 4}  # Set of commit numbers that should raise IntegrityError
-    commit_count = 0
 
-    async def mock_commit():
-        nonlocal commit_count
-        commit_count += 1
-        if commit_count in error_commits:
-            raise IntegrityError(None, None, None)
-        return None
-
-    mock_db_session.commit = AsyncMock(side_effect=mock_commit)
-    mock_db_session.rollback = AsyncMock()
+    # Only the duplicate version's commit fails
+    mock_db_session.commit = AsyncMock(side_effect=[None, IntegrityError(None, None, None), None])
 
     # Create initial projects
     project1 = mock_models.Project(name="Project 1")
     project2 = mock_models.Project(name="Project 2")
     mock_db_session.add_all([project1, project2])
-    await mock_db_session.commit()  # commit_count = 1
+    await mock_db_session.commit()
 
     # Test duplicate version number
-    mock_version = MagicMock(spec=Version)
-    mock_version.project_id = project1.id
-    mock_version.version_number = 0
-    mock_version.name = "Duplicate Version"
+    mock_version = FakeVersion(project_id=project1.id, version_number=0, name="Duplicate Version")
     mock_models.Version.return_value = mock_version
 
     with pytest.raises(IntegrityError):
         version = mock_models.Version(project_id=project1.id, version_number=0, name="Duplicate Version")
         mock_db_session.add(version)
-        await mock_db_session.commit()  # commit_count = 2 (raises error)
+        await mock_db_session.commit()  # raises
     await mock_db_session.rollback()
 
     # Test invalid parent version from different project
-    mock_version = MagicMock(spec=Version)
-    mock_version.project_id = project1.id
-    mock_version.name = "Invalid Parent"
-    mock_version.parent_id = project2.versions[0].id
+    mock_version = FakeVersion(
+        project_id=project1.id, name="Invalid Parent", parent_id=project2.versions[0].id
+    )
     
     # Mock validate method to raise NoodleError
     async def mock_validate(session):
@@ -237,12 +220,13 @@ async def test_version_validation(mock_db_session, mock_models):
     # No need to commit or rollback since validate will raise the error
 
     # Test successful version creation
-    next_version_number = max(v.version_number for v in project1.versions) + 1
-    mock_version = MagicMock(spec=Version)
-    mock_version.project_id = project1.id
-    mock_version.version_number = next_version_number
-    mock_version.name = "Valid Version"
-    mock_version.parent_id = project1.versions[0].id
+    next_version_number = 1  # project1 only has version 0
+    mock_version = FakeVersion(
+        project_id=project1.id,
+        version_number=next_version_number,
+        name="Valid Version",
+        parent_id=project1.versions[0].id,
+    )
     mock_models.Version.return_value = mock_version
 
     version = mock_models.Version(
@@ -252,264 +236,148 @@ async def test_version_validation(mock_db_session, mock_models):
         parent_id=project1.versions[0].id
     )
     mock_db_session.add(version)
-    await mock_db_session.commit()  # commit_count = 6
+    await mock_db_session.commit()
 
     assert version.version_number == next_version_number
     assert version.parent_id == project1.versions[0].id
 
-@pytest.mark.asyncio
-async def test_latest_version_number(mock_db_session, mock_models):
-    """Test latest_version_number property."""
-    # Test project with versions
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.versions = [MagicMock(spec=Version) for _ in range(4)]
-    mock_project.versions[0].version_number = 0
-    mock_project.versions[1].version_number = 3
-    mock_project.versions[2].version_number = 1
-    mock_project.versions[3].version_number = 5
-    
-    # Mock the latest_version_number property
-    type(mock_project).latest_version_number = PropertyMock(return_value=5)
-
-    mock_models.Project.return_value = mock_project
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
-
-    project = mock_models.Project(name="Test Project")  # Use mock Project class
-    mock_db_session.add(project)
-    await mock_db_session.commit()
-    await mock_db_session.refresh(project)
-
-    assert project.latest_version_number == 5
-
-    # Test project with no versions
-    mock_project_no_versions = MagicMock(spec=Project)
-    mock_project_no_versions.id = uuid4()
-    mock_project_no_versions.versions = []
-    type(mock_project_no_versions).latest_version_number = PropertyMock(return_value=0)
+async def test_latest_version_number(db_session):
+    """Test latest_version_number in Python and in SQL."""
+    project = Project(name="Test Project")
+    project_no_versions = Project(name="Test Project No Versions")
+    db_session.add_all([project, project_no_versions])
+    await db_session.commit()
+    db_session.add_all(
+        Version(project_id=project.id, version_number=n, name=f"Version {n}")
+        for n in (0, 3, 1, 5)
+    )
+    await db_session.commit()
+    db_session.expunge_all()
+
+    for project_id, expected in ((project.id, 5), (project_no_versions.id, 0)):
+        loaded = await db_session.get(Project, project_id)
+        assert loaded.latest_version_number == expected
+        assert await db_session.scalar(
+            select(Project.latest_version_number).where(Project.id == project_id)
+        ) == expected
+
+async def test_latest_version_number_queries(db_session, count_selects):
+    """Test latest_version_number is served from the eagerly loaded versions."""
+    project = Project(name="Test Project")
+    db_session.add(project)
+    await db_session.commit()
+    db_session.add_all(
+        Version(project_id=project.id, version_number=n, name=f"Version {n}")
+        for n in (0, 3, 1, 5)
+    )
+    await db_session.commit()
+    db_session.expunge_all()
 
-    mock_models.Project.return_value = mock_project_no_versions
-    
-    project_no_versions = mock_models.Project(name="Test Project No Versions")  # Use mock Project class
-    mock_db_session.add(project_no_versions)
-    await mock_db_session.commit()
-    await mock_db_session.refresh(project_no_versions)
+    # One query for the project and one selectin load for its versions
+    with count_selects() as statements:
+        project = await db_session.get(Project, project.id)
+    assert len(statements) == 2
 
-    assert project_no_versions.latest_version_number == 0
+    # Reading the property afterwards must not touch the database
+    with count_selects() as statements:
+        assert project.latest_version_number == 5
+    assert statements == []
 
-@pytest.mark.asyncio
-async def test_async_validation(mock_db_session, mock_models):
+async def test_async_validation(mock_db_session, install_project_mock, mock_project_factory):
     """Test async validation handling."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    
+    mock_project = mock_project_factory()
+
     # Add an async validate method
     async def async_validate(session):
         # Simulate async validation
         return True
     
     mock_project.validate = async_validate
-    
-    mock_models.Project.return_value = mock_project
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
 
-    project = mock_models.Project(name="Test Project")
-    mock_db_session.add(project)
-    await mock_db_session.commit()  # This should trigger the async validate method
-    await mock_db_session.refresh(project)
+    with install_project_mock(mock_project) as project:
+        mock_db_session.add(project)
+        await mock_db_session.commit()  # This should trigger the async validate method
 
     assert project.id is not None
 
-@pytest.mark.asyncio
-async def test_project_timestamps(mock_db_session, mock_models):
+def test_project_timestamps():
     """Test project timestamp behavior."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    
-    # Initial timestamps
+    # Seed the timestamps as if the project had been loaded from the database
     created_at = datetime(2025, 2, 24, 20, 0, 0)
-    updated_at = datetime(2025, 2, 24, 20, 0, 0)
-    mock_project.created_at = created_at
-    mock_project.updated_at = updated_at
-
-    mock_models.Project.return_value = mock_project
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
-
-    project = mock_models.Project(name="Test Project")
-    mock_db_session.add(project)
-    await mock_db_session.commit()
+    project = Project(name="Test Project")
+    set_committed_value(project, "id", next_uuid())
+    set_committed_value(project, "created_at", created_at)
+    set_committed_value(project, "updated_at", created_at)
 
     assert project.created_at == created_at
-    assert project.updated_at == updated_at
+    assert project.updated_at == created_at
 
-    # Update project and set a new updated_at timestamp
+    # Renaming leaves updated_at untouched client-side; the database sets it
     project.name = "Updated Name"
+    assert inspect(project).attrs.updated_at.history.unchanged == [created_at]
+
     new_updated_at = datetime(2025, 2, 24, 20, 1, 0)  # 1 minute later
-    mock_project.updated_at = new_updated_at
-    await mock_db_session.commit()
-    await mock_db_session.refresh(project)
+    set_committed_value(project, "updated_at", new_updated_at)
 
     assert project.created_at == created_at
     assert project.updated_at == new_updated_at
     assert project.updated_at > project.created_at
 
-@pytest.mark.asyncio
-async def test_version_ordering(mock_db_session, mock_models):
-    """Test version ordering within project."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.versions = []
-
-    # Create versions in non-sequential order
-    version_numbers = [3, 1, 4, 0, 2]
-    for number in version_numbers:
-        mock_version = MagicMock(spec=Version)
-        mock_version.id = uuid4()
-        mock_version.version_number = number
-        mock_version.name = f"Version {number}"
-        mock_project.versions.append(mock_version)
-
-    mock_models.Project.return_value = mock_project
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
-
-    project = mock_models.Project(name="Test Project")
-    mock_db_session.add(project)
-    await mock_db_session.commit()
-    await mock_db_session.refresh(project)
+@pytest.mark.parametrize("version_numbers", [
+    pytest.param([0], id="single"),
+    pytest.param(range(3), id="sequential"),
+    pytest.param([3, 1, 4, 0, 2], id="ordering"),
+])
+async def test_project_with_versions(
+    mock_db_session, install_project_mock, mock_project_factory, version_numbers
+):
+    """Test a project's versions sort into a gapless sequence."""
+    with install_project_mock(mock_project_factory(version_numbers=version_numbers)) as project:
+        mock_db_session.add(project)
+        await mock_db_session.commit()
 
     # Verify versions are ordered by version_number
-    assert len(project.versions) == 5
-    for i, version in enumerate(sorted(project.versions, key=lambda v: v.version_number)):
+    assert len(project.versions) == len(version_numbers)
+    for i, version in enumerate(sorted(project.versions, key=_by_version_number)):
         assert version.version_number == i
 
-@pytest.mark.asyncio
-async def test_cascade_delete(mock_db_session, mock_models):
+async def test_cascade_delete(
+    mock_db_session, install_project_mock, mock_project_factory, set_query_results
+):
     """Test cascade delete behavior with versions."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.versions = []
-
-    # Create project with versions
-    for i in range(3):
-        mock_version = MagicMock(spec=Version)
-        mock_version.id = uuid4()
-        mock_version.version_number = i
-        mock_version.name = f"Version {i}"
-        mock_project.versions.append(mock_version)
-
-    mock_models.Project.return_value = mock_project
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
-
-    # Create project and verify versions
-    project = mock_models.Project(name="Test Project")
-    mock_db_session.add(project)
-    await mock_db_session.commit()
-    await mock_db_session.refresh(project)
+    # Create project with versions and verify them
+    with install_project_mock(mock_project_factory(version_numbers=range(3))) as project:
+        mock_db_session.add(project)
+        await mock_db_session.commit()
 
     assert len(project.versions) == 3
 
-    # Set up mock query to simulate cascade delete
-    def mock_query_filter(model_class):
-        def filter_func(*args):
-            class MockFilter:
-                def all(self):
-                    # After delete, return empty list
-                    if hasattr(mock_db_session, '_deleted'):
-                        return []
-                    return project.versions
-            return MockFilter()
-        return MagicMock(filter=filter_func)
-
-    mock_db_session.query = mock_query_filter
+    # The versions exist before the delete and are gone after it
+    set_query_results(project.versions, [])
+    versions = mock_db_session.query(Version).filter(Version.project_id == project.id).all()
+    assert len(versions) == 3
 
     # Delete project
     mock_db_session.delete(project)
     await mock_db_session.commit()
-    
-    # Mark session as having performed delete
-    mock_db_session._deleted = True
 
     # Verify versions were cascade deleted
     remaining_versions = mock_db_session.query(Version).filter(Version.project_id == project.id).all()
     assert len(remaining_versions) == 0
 
 
-@pytest.mark.asyncio
-async def test_description_constraints(mock_db_session, mock_models):
+async def test_description_constraints(mock_db_session, install_project_mock, mock_project_factory):
     """Test project description field constraints."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.description = ""
-
-    mock_models.Project.return_value = mock_project
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
-
     # Test default empty description
-    project = mock_models.Project(name="Test Project")
-    mock_db_session.add(project)
-    await mock_db_session.commit()
-    await mock_db_session.refresh(project)
+    with install_project_mock(mock_project_factory(description="")) as project:
+        mock_db_session.add(project)
+        await mock_db_session.commit()
 
     assert project.description == ""
 
     # Test large description
-    large_description = "x" * (1024 * 1024)  # 1MB description
-    mock_project.description = large_description
-    
-    project = mock_models.Project(name="Test Project", description=large_description)
-    mock_db_session.add(project)
-    await mock_db_session.commit()
-    await mock_db_session.refresh(project)
-
-    assert len(project.description) == len(large_description)
-
-@pytest.mark.asyncio
-async def test_selectin_loading(mock_db_session, mock_models):
-    """Test selectin loading strategy for versions relationship."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.versions = []
-
-    # Create versions
-    for i in range(3):
-        mock_version = MagicMock(spec=Version)
-        mock_version.id = uuid4()
-        mock_version.version_number = i
-        mock_version.name = f"Version {i}"
-        mock_project.versions.append(mock_version)
-
-    mock_models.Project.return_value = mock_project
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
-
-    # Create project
-    project = mock_models.Project(name="Test Project")
-    mock_db_session.add(project)
-    await mock_db_session.commit()
-    await mock_db_session.refresh(project)
+    with install_project_mock(mock_project_factory(description=_LARGE_DESCRIPTION)) as project:
+        mock_db_session.add(project)
+        await mock_db_session.commit()
 
-    # Mock selectin loading behavior
-    mock_db_session.query.return_value.options.return_value.filter.return_value.first.return_value = project
-    mock_db_session.query.return_value.filter.return_value.all.return_value = project.versions
-
-    # Verify versions are loaded with selectin strategy
-    loaded_project = mock_db_session.query(Project).options().filter(Project.id == project.id).first()
-    assert loaded_project is not None
-    assert len(loaded_project.versions) == 3  # Versions should be loaded eagerly
-    
-    # Verify no additional queries needed for versions
-    versions = loaded_project.versions
-    assert len(versions) == 3  # Should use already loaded versions
+    assert len(project.description) == len(_LARGE_DESCRIPTION)
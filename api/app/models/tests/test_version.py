@@ -1,122 +1,129 @@
 """Tests for Version model."""
 import pytest
-from unittest.mock import MagicMock, AsyncMock
+from unittest.mock import MagicMock
+from sqlalchemy import func, select
 from sqlalchemy.exc import IntegrityError
-from uuid import uuid4
 from ...models.project import Project
 from ...models.version import Version
 from ...models.file import File
-from ...errors import NoodleError, ErrorType
+from ...errors import NoodleError
+from .fakes import FakeVersion, next_uuid
 from datetime import datetime
 
-@pytest.mark.asyncio
-async def test_version_creation(mock_db_session, mock_models):
-    """Test basic version creation."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.active = True
-    mock_project.versions = [MagicMock(spec=Version)]
-    mock_project.versions[0].id = uuid4()
-    mock_project.versions[0].version_number = 0
-
-    mock_version = MagicMock(spec=Version)
-    mock_version.id = uuid4()
-    mock_version.name = "Test Version"
-    mock_version.version_number = 1
-    mock_version.active = mock_project.active
-    mock_version.created_at = MagicMock()
-    mock_version.updated_at = MagicMock()
-    mock_version.parent_id = mock_project.versions[0].id
+async def _add_project_with_initial_version(session):
+    """Commit a new project with version 0 and return both."""
+    project = Project(name="Test Project")
+    session.add(project)
+    await session.commit()
 
-    mock_models.Project.return_value = mock_project
-    mock_models.Version.return_value = mock_version
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
+    initial = Version(project_id=project.id, version_number=0, name="Initial Version")
+    session.add(initial)
+    await session.commit()
+    return project, initial
 
-    version = mock_models.Version(
-        project_id=mock_project.id,
+async def test_version_creation(db_session):
+    """Test basic version creation, validated on commit."""
+    project, initial = await _add_project_with_initial_version(db_session)
+
+    version = Version(
+        project_id=project.id,
         version_number=1,
         name="Test Version",
-        parent_id=mock_project.versions[0].id
+        parent_id=initial.id
     )
-    mock_db_session.add(version)
-    await mock_db_session.commit()
-    await mock_db_session.refresh(version)
+    db_session.add(version)
+    await db_session.commit()
 
     assert version.id is not None
     assert version.name == "Test Version"
     assert version.version_number == 1
-    assert version.active == mock_project.active
     assert version.created_at is not None
     assert version.updated_at is not None
-    assert version.parent_id == mock_project.versions[0].id
-
-@pytest.mark.asyncio
-async def test_version_file_relationships(mock_db_session, mock_models):
-    """Test version file relationships."""
-    # Setup mock project and version
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.active = True
-
-    mock_version = MagicMock(spec=Version)
-    mock_version.id = uuid4()
-    mock_version.files = []
-    mock_version.project_id = mock_project.id
-
-    # Setup session.get to return mock project
-    def mock_get(model_class, id_):
-        if model_class == Project and id_ == mock_project.id:
-            return mock_project
-        return None
-    mock_db_session.get = MagicMock(side_effect=mock_get)
-
-    mock_models.Version.return_value = mock_version
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
-
-    version = mock_models.Version(project_id=mock_project.id, version_number=1, name="Test Version")
-    mock_db_session.add(version)
-    await mock_db_session.commit()
-    await mock_db_session.refresh(version)
-
-    for i in range(3):
-        file = File(
-            version_id=version.id,
-            path=f"src/test{i}.tsx",
-            content=f"Test content {i}"
-        )
-        version.files.append(file)
-        mock_db_session.add(file)
-    await mock_db_session.commit()
-
-    assert len(version.files) == 3
-    for i, file in enumerate(version.files):
-        assert file.path == f"src/test{i}.tsx"
-        assert file.content == f"Test content {i}"
-
-    mock_db_session.delete.return_value = None
-    mock_db_session.query.return_value.filter.return_value.all.return_value = []
+    assert version.parent_id == initial.id
+    # The project relationship is not loaded, so read the hybrid in SQL
+    assert await db_session.scalar(select(Version.active).where(Version.id == version.id)) is True
 
-    mock_db_session.delete(version)
-    await mock_db_session.commit()
-
-    files = mock_db_session.query(File).filter(File.version_id == version.id).all()
-    assert len(files) == 0
+async def test_version_file_relationships(db_session):
+    """Test version file relationships and the cascade delete of files."""
+    project, version = await _add_project_with_initial_version(db_session)
 
-@pytest.mark.asyncio
-async def test_version_file_constraints(mock_db_session, mock_models):
+    db_session.add_all(
+        File(version_id=version.id, path=f"src/test{i}.tsx", content=f"Test content {i}")
+        for i in (2, 0, 1)
+    )
+    await db_session.commit()
+
+    # Files load ordered by path
+    await db_session.refresh(version, ["files"])
+    assert [(f.path, f.content) for f in version.files] == [
+        (f"src/test{i}.tsx", f"Test content {i}") for i in range(3)
+    ]
+
+    await db_session.delete(version)
+    await db_session.commit()
+
+    # Count the remaining files rather than loading them
+    assert await db_session.scalar(
+        select(func.count()).select_from(File).where(File.version_id == version.id)
+    ) == 0
+
+@pytest.mark.parametrize("case,error,match", [
+    pytest.param("duplicate_version_number", IntegrityError, None, id="duplicate_version_number"),
+    pytest.param(
+        "cross_project_parent", NoodleError, "Parent version must be from the same project",
+        id="cross_project_parent",
+    ),
+    pytest.param(
+        "inactive_project", NoodleError, "Cannot create version in inactive project",
+        id="inactive_project",
+    ),
+])
+async def test_version_rejects(db_session, case, error, match):
+    """Test versions rejected on commit, by the listener or the database."""
+    project, initial = await _add_project_with_initial_version(db_session)
+
+    version_number, parent_id = 1, initial.id
+    if case == "duplicate_version_number":
+        version_number = initial.version_number
+    elif case == "cross_project_parent":
+        _, other_initial = await _add_project_with_initial_version(db_session)
+        parent_id = other_initial.id
+    elif case == "inactive_project":
+        project.active = False
+        await db_session.commit()
+
+    # Construction does not touch the database; the error surfaces on commit
+    db_session.add(Version(
+        project_id=project.id, version_number=version_number, name="Test Version", parent_id=parent_id
+    ))
+    with pytest.raises(error, match=match):
+        await db_session.commit()
+    await db_session.rollback()
+
+async def test_version_commit_validation_queries(db_session, count_selects):
+    """Test commit-time validation loads the projects involved in one query."""
+    projects = [Project(name=f"Project {i}") for i in range(3)]
+    db_session.add_all(projects)
+    await db_session.commit()
+    db_session.expunge_all()
+
+    db_session.add_all(
+        Version(project_id=project.id, version_number=0, name="Initial Version")
+        for project in projects
+    )
+    # One query for the projects and one selectin load for their versions
+    with count_selects() as statements:
+        await db_session.commit()
+    assert len(statements) == 2
+
+async def test_version_file_constraints(
+    mock_db_session, mock_models, raise_on_commit, mock_project_factory
+):
     """Test version file constraints."""
     # Setup mock project and version
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.active = True
+    mock_project = mock_project_factory()
 
-    mock_version = MagicMock(spec=Version)
-    mock_version.id = uuid4()
-    mock_version.project_id = mock_project.id
+    mock_version = FakeVersion(project_id=mock_project.id)
 
     # Setup session.get to return mock project
     def mock_get(model_class, id_):
@@ -126,9 +133,6 @@ async def test_version_file_constraints(mock_db_session, mock_models):
     mock_db_session.get = MagicMock(side_effect=mock_get)
 
     mock_models.Version.return_value = mock_version
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.side_effect = AsyncMock()
-    mock_db_session.rollback.return_value = AsyncMock()
 
     version = mock_models.Version(project_id=mock_project.id, version_number=1, name="Test Version")
     mock_db_session.add(version)
@@ -138,48 +142,31 @@ async def test_version_file_constraints(mock_db_session, mock_models):
     mock_db_session.add(file1)
     await mock_db_session.commit()
 
-    # Reset commit side effect for the duplicate file test
-    mock_db_session.commit.side_effect = IntegrityError(None, None, None)
-    
-    with pytest.raises(IntegrityError):
-        file2 = File(version_id=version.id, path="src/test.tsx", content="Different content")
-        mock_db_session.add(file2)
-        await mock_db_session.commit()
+    with raise_on_commit(IntegrityError(None, None, None)):
+        with pytest.raises(IntegrityError):
+            file2 = File(version_id=version.id, path="src/test.tsx", content="Different content")
+            mock_db_session.add(file2)
+            await mock_db_session.commit()
     await mock_db_session.rollback()
 
-    # Reset commit side effect
-    mock_db_session.commit.side_effect = AsyncMock()
-
-    with pytest.raises(ValueError, match="File path cannot be empty"):
-        File(version_id=version.id, path="", content="Test content")
-
-    with pytest.raises(ValueError, match="File content cannot be null"):
-        File(version_id=version.id, path="src/test2.tsx", content=None)
-
-@pytest.mark.asyncio
-async def test_version_inheritance(mock_db_session, mock_models):
+async def test_version_inheritance(
+    mock_db_session, mock_models, mock_project_factory, set_scalars_results
+):
     """Test version inheritance behavior."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.versions = [MagicMock(spec=Version) for _ in range(4)]
-    for i, version in enumerate(mock_project.versions):
-        version.id = uuid4()
-        version.version_number = i
-        version.parent_id = mock_project.versions[i-1].id if i > 0 else None
-        version.active = True
+    mock_project = mock_project_factory(version_numbers=range(4))
+    for parent, version in zip(mock_project.versions, mock_project.versions[1:]):
+        version.parent_id = parent.id
 
     mock_models.Project.return_value = mock_project
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
-    mock_db_session.query.return_value.filter.return_value.order_by.return_value.all.return_value = mock_project.versions
+    set_scalars_results(mock_project.versions)
 
     project = Project(name="Test Project")
     mock_db_session.add(project)
     await mock_db_session.commit()
-    await mock_db_session.refresh(project)
 
-    versions = mock_db_session.query(Version).filter(Version.project_id == project.id).order_by(Version.version_number).all()
+    versions = (await mock_db_session.scalars(
+        select(Version).where(Version.project_id == project.id).order_by(Version.version_number)
+    )).all()
 
     assert len(versions) == 4
     for i, version in enumerate(versions):
@@ -191,108 +178,41 @@ async def test_version_inheritance(mock_db_session, mock_models):
     for version in versions:
         version.active = False
     await mock_db_session.commit()
-    await mock_db_session.refresh(project)
 
-    for version in versions:
-        await mock_db_session.refresh(version)
-        assert version.active is False
+    assert all(version.active is False for version in versions)
 
-@pytest.mark.asyncio
-async def test_version_validation(mock_db_session, mock_models):
-    """Test version validation rules."""
+def test_version_validation():
+    """Test Version constructor validation, which needs no session."""
     # Test negative version number
     with pytest.raises(NoodleError, match="Version number cannot be negative"):
-        Version(project_id=uuid4(), version_number=-1, name="Test Version")
+        Version(project_id=next_uuid(), version_number=-1, name="Test Version")
 
     # Test default version number
-    version = Version(project_id=uuid4(), name="Test Version")
+    version = Version(project_id=next_uuid(), name="Test Version")
     assert version.version_number == 0
 
     # Test version name validation
-    version = Version(project_id=uuid4(), name="", version_number=1)  # Empty name is allowed
+    version = Version(project_id=next_uuid(), name="", version_number=1)  # Empty name is allowed
     assert version.name == ""
 
-    version = Version(project_id=uuid4(), name="Test Version", version_number=1)
+    version = Version(project_id=next_uuid(), name="Test Version", version_number=1)
     assert version.name == "Test Version"
 
-    mock_project1 = MagicMock(spec=Project)
-    mock_project1.id = uuid4()
-    mock_project1.versions = [MagicMock(spec=Version)]
-    mock_project1.versions[0].id = uuid4()
-    mock_project1.versions[0].version_number = 0
-    mock_project1.active = True
-
-    mock_project2 = MagicMock(spec=Project)
-    mock_project2.id = uuid4()
-    mock_project2.versions = [MagicMock(spec=Version)]
-    mock_project2.versions[0].id = uuid4()
-
-    mock_models.Project.side_effect = [mock_project1, mock_project2]
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.rollback.return_value = AsyncMock()
-    
-    # Configure session.get to return our mock project
-    mock_db_session.get.side_effect = lambda model, id: mock_project1 if id == mock_project1.id else mock_project2
-
-    # Test 1: Missing project_id
+    # Test missing project_id
     with pytest.raises(NoodleError, match="project_id is required"):
         Version(name="Test Version")
 
-    # Test 2: Duplicate version number
-    mock_db_session.commit.side_effect = IntegrityError(None, None, None)
-    version = Version(project_id=mock_project1.id, version_number=0, name="Test Version", parent_id=mock_project1.versions[0].id)
-    mock_db_session.add(version)
-    with pytest.raises(IntegrityError):
-        await mock_db_session.commit()
-    await mock_db_session.rollback()
-
-    # Test 3: Invalid parent version from different project
-    version = Version(project_id=mock_project1.id, name="Test Version", parent_id=mock_project2.versions[0].id)
-    mock_db_session.add(version)
-    with pytest.raises(IntegrityError):
-        await mock_db_session.commit()
-    await mock_db_session.rollback()
-
-    # Test 4: Inactive project
-    mock_db_session.commit.side_effect = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_project1.active = False
-    
-    next_version_number = max(v.version_number for v in mock_project1.versions) + 1
-    
-    # Pass mock session directly in kwargs
-    with pytest.raises(NoodleError, match="Cannot create version in inactive project"):
-        Version(
-            project_id=mock_project1.id,
-            version_number=next_version_number,
-            name="Test Version",
-            parent_id=mock_project1.versions[0].id,
-            session=mock_db_session
-        )
-
-@pytest.mark.asyncio
-async def test_version_timestamps(mock_db_session, mock_models):
+async def test_version_timestamps(mock_db_session, mock_models, mock_project_factory):
     """Test version timestamp behavior."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.versions = [MagicMock(spec=Version)]
-    mock_project.versions[0].id = uuid4()
-
-    mock_version = MagicMock(spec=Version)
-    mock_version.id = uuid4()
-    
+    mock_project = mock_project_factory(version_numbers=[0])
+
     # Initial timestamps
     created_at = datetime(2025, 2, 24, 20, 0, 0)
     updated_at = datetime(2025, 2, 24, 20, 0, 0)
-    mock_version.created_at = created_at
-    mock_version.updated_at = updated_at
+    mock_version = FakeVersion(created_at=created_at, updated_at=updated_at)
 
     mock_models.Project.return_value = mock_project
     mock_models.Version.return_value = mock_version
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
 
     version = mock_models.Version(project_id=mock_project.id, version_number=1, name="Test Version", parent_id=mock_project.versions[0].id)
     mock_db_session.add(version)
@@ -306,25 +226,18 @@ async def test_version_timestamps(mock_db_session, mock_models):
     new_updated_at = datetime(2025, 2, 24, 20, 1, 0)  # 1 minute later
     mock_version.updated_at = new_updated_at
     await mock_db_session.commit()
-    await mock_db_session.refresh(version)
 
     assert version.created_at == created_at
     assert version.updated_at == new_updated_at
     assert version.updated_at > version.created_at
 
-@pytest.mark.asyncio
-async def test_active_property_inheritance(mock_db_session, mock_models):
+async def test_active_property_inheritance(mock_db_session, mock_models, mock_project_factory):
     """Test active property inheritance from project."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.active = True
+    mock_project = mock_project_factory()
 
     # Setup mock version with proper SQLAlchemy relationship
-    mock_version = MagicMock(spec=Version)
-    mock_version.id = uuid4()
-    mock_version.project_id = mock_project.id
+    mock_version = FakeVersion(project_id=mock_project.id, active=mock_project.active)
     mock_version.project = mock_project
-    mock_version.active = mock_project.active  # Set up the hybrid property
 
     def mock_get(model_class, id_):
         if model_class == Project and id_ == mock_project.id:
@@ -333,14 +246,10 @@ async def test_active_property_inheritance(mock_db_session, mock_models):
     mock_db_session.get = MagicMock(side_effect=mock_get)
 
     mock_models.Version.return_value = mock_version
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
 
     version = mock_models.Version(project_id=mock_project.id, version_number=1)
     mock_db_session.add(version)
     await mock_db_session.commit()
-    await mock_db_session.refresh(version)
 
     # Test active property inheritance
     assert version.active == mock_project.active
@@ -350,16 +259,12 @@ async def test_active_property_inheritance(mock_db_session, mock_models):
     mock_version.active = mock_project.active  # Update mock version's active property
     assert version.active == mock_project.active
 
-@pytest.mark.asyncio
-async def test_version_number_uniqueness(mock_db_session, mock_models):
+async def test_version_number_uniqueness(
+    mock_db_session, mock_models, raise_on_commit, mock_project_factory
+):
     """Test version number uniqueness within a project."""
-    mock_project1 = MagicMock(spec=Project)
-    mock_project1.id = uuid4()
-    mock_project1.active = True
-
-    mock_project2 = MagicMock(spec=Project)
-    mock_project2.id = uuid4()
-    mock_project2.active = True
+    mock_project1 = mock_project_factory()
+    mock_project2 = mock_project_factory()
 
     def mock_get(model_class, id_):
         if model_class == Project:
@@ -371,34 +276,24 @@ async def test_version_number_uniqueness(mock_db_session, mock_models):
     mock_db_session.get = MagicMock(side_effect=mock_get)
 
     # Create version in first project
-    mock_version1 = MagicMock(spec=Version)
-    mock_version1.id = uuid4()
-    mock_version1.project_id = mock_project1.id
-    mock_version1.version_number = 1
+    mock_version1 = FakeVersion(project_id=mock_project1.id, version_number=1)
 
     mock_models.Version.return_value = mock_version1
-    mock_db_session.add.return_value = None
-    mock_db_session.commit.return_value = AsyncMock()
-    mock_db_session.refresh.return_value = AsyncMock()
 
     version1 = mock_models.Version(project_id=mock_project1.id, version_number=1)
     mock_db_session.add(version1)
     await mock_db_session.commit()
 
     # Try to create version with same number in same project
-    mock_db_session.commit.side_effect = IntegrityError(None, None, None)
-    with pytest.raises(IntegrityError):
-        version2 = mock_models.Version(project_id=mock_project1.id, version_number=1)
-        mock_db_session.add(version2)
-        await mock_db_session.commit()
+    with raise_on_commit(IntegrityError(None, None, None)):
+        with pytest.raises(IntegrityError):
+            version2 = mock_models.Version(project_id=mock_project1.id, version_number=1)
+            mock_db_session.add(version2)
+            await mock_db_session.commit()
     await mock_db_session.rollback()
 
     # Create version with same number in different project
-    mock_db_session.commit.side_effect = None
-    mock_version2 = MagicMock(spec=Version)
-    mock_version2.id = uuid4()
-    mock_version2.project_id = mock_project2.id
-    mock_version2.version_number = 1
+    mock_version2 = FakeVersion(project_id=mock_project2.id, version_number=1)
 
     mock_models.Version.return_value = mock_version2
     version2 = mock_models.Version(project_id=mock_project2.id, version_number=1)
@@ -409,12 +304,9 @@ async def test_version_number_uniqueness(mock_db_session, mock_models):
     assert version1.project_id != version2.project_id
 
 
-@pytest.mark.asyncio
-async def test_version_validation_with_session(mock_db_session, mock_models):
-    """Test version validation with session parameter."""
-    mock_project = MagicMock(spec=Project)
-    mock_project.id = uuid4()
-    mock_project.active = True
+def test_version_validate(mock_db_session, mock_project_factory):
+    """Test Version.validate against the session, as run by the commit listener."""
+    mock_project = mock_project_factory()
 
     def mock_get(model_class, id_):
         if model_class == Project and id_ == mock_project.id:
@@ -422,37 +314,20 @@ async def test_version_validation_with_session(mock_db_session, mock_models):
         return None
     mock_db_session.get = MagicMock(side_effect=mock_get)
 
-    # Test validation with session in constructor
-    version = Version(
-        project_id=mock_project.id,
-        version_number=1,
-        name="Test Version",
-        session=mock_db_session
-    )
-    assert version.project_id == mock_project.id
-    assert version.version_number == 1
+    # Construction never queries the session
+    version = Version(project_id=mock_project.id, version_number=1, name="Test Version")
+    mock_db_session.get.assert_not_called()
+    version.validate(mock_db_session)  # Should not raise error
 
     # Test validation with inactive project
     mock_project.active = False
     with pytest.raises(NoodleError, match="Cannot create version in inactive project"):
-        Version(
-            project_id=mock_project.id,
-            version_number=2,
-            name="Test Version",
-            session=mock_db_session
-        )
-
-    # Test validation with explicit validate call
-    mock_project.active = True
-    version = Version(project_id=mock_project.id, version_number=3)
-    version.validate(mock_db_session)  # Should not raise error
+        version.validate(mock_db_session)
 
     # Test validation with invalid parent
-    mock_project2 = MagicMock(spec=Project)
-    mock_project2.id = uuid4()
-    mock_version = MagicMock(spec=Version)
-    mock_version.id = uuid4()
-    mock_version.project_id = mock_project2.id
+    mock_project.active = True
+    mock_project2 = mock_project_factory()
+    mock_version = FakeVersion(project_id=mock_project2.id)
 
     def mock_get_with_parent(model_class, id_):
         if model_class == Project and id_ == mock_project.id:
@@ -462,10 +337,6 @@ async def test_version_validation_with_session(mock_db_session, mock_models):
         return None
     mock_db_session.get = MagicMock(side_effect=mock_get_with_parent)
 
+    version = Version(project_id=mock_project.id, version_number=4, parent_id=mock_version.id)
     with pytest.raises(NoodleError, match="Parent version must be from the same project"):
-        version = Version(
-            project_id=mock_project.id,
-            version_number=4,
-            parent_id=mock_version.id,
-            session=mock_db_session
-        )
+        version.validate(mock_db_session)
@@ -4,12 +4,10 @@ Version database model.
 from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
-from sqlalchemy import String, Integer, ForeignKey, UniqueConstraint, CheckConstraint, event
-from sqlalchemy.orm import Mapped, mapped_column, relationship, object_session, Session
+from sqlalchemy import String, Integer, ForeignKey, UniqueConstraint, CheckConstraint, event, select
+from sqlalchemy.orm import Mapped, mapped_column, relationship, Session
 from sqlalchemy.ext.hybrid import hybrid_property
 
-from sqlalchemy.orm.session import object_session
-
 from .base import Base
 from .file import File
 from .project import Project
@@ -50,21 +48,18 @@ class Version(Base):
         if kwargs['version_number'] < 0:
             raise NoodleError("Version number cannot be negative")
             
-        # Get session for validation
-        session = kwargs.pop('session', None)
-            
         # Store project_id for validation
         self.project_id = kwargs['project_id']
             
         # Initialize to set up relationships
         super().__init__(**kwargs)
 
-        # Validate if we have a session
-        if session or (session := object_session(self)):
-            self.validate(session)
-
     def validate(self, session):
-        """Validate version state."""
+        """Validate version state against the database.
+
+        Called for every pending version by the ``before_commit`` listener
+        rather than on construction, so building a version costs no queries.
+        """
         project = session.get(Project, self.project_id)
         if not project or not project.active:
             raise NoodleError("Cannot create version in inactive project")
@@ -80,6 +75,8 @@ class Version(Base):
 
     # Relationships
     project: Mapped["Project"] = relationship("Project", back_populates="versions")
+    # Lets the unit of work delete child versions before the parent they reference
+    parent: Mapped[Optional["Version"]] = relationship(remote_side="Version.id")
     files: Mapped[List["File"]] = relationship(
         back_populates="version",
         cascade="all, delete-orphan",
@@ -91,9 +88,30 @@ class Version(Base):
         """Whether this version is active (inherited from project)."""
         return self.project.active
 
+    @active.expression
+    def active(cls):
+        """Read the owning project's active flag in SQL."""
+        return select(Project.active).where(Project.id == cls.project_id).scalar_subquery()
+
 @event.listens_for(Session, "before_commit")
 def validate_version_before_commit(session):
-    """Validate version creation before commit."""
-    for obj in session.new:
-        if isinstance(obj, Version):
-            obj.validate(session)
+    """Validate version creation before commit.
+
+    The projects and parent versions involved are loaded with one query
+    each, so the ``session.get`` calls in ``validate`` are served from the
+    identity map instead of costing a round trip per new version.
+    """
+    versions = [obj for obj in session.new if isinstance(obj, Version)]
+    if not versions:
+        return
+
+    project_ids = {version.project_id for version in versions}
+    parent_ids = {version.parent_id for version in versions if version.parent_id}
+    # Hold the loaded rows so the weak-referencing identity map keeps them
+    with session.no_autoflush:
+        loaded = session.scalars(select(Project).where(Project.id.in_(project_ids))).all()
+        if parent_ids:
+            loaded += session.scalars(select(Version).where(Version.id.in_(parent_ids))).all()
+
+    for version in versions:
+        version.validate(session)
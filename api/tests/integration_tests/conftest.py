@@ -4,8 +4,8 @@ import pytest_asyncio
 from pathlib import Path
 from dotenv import load_dotenv
 from httpx import AsyncClient
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-import asyncio
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import NullPool
 
 # Load environment variables before importing app modules
 env_path = Path(__file__).parent / "test.env"
@@ -19,42 +19,21 @@ from app.services.openrouter import OpenRouterService
 from app.schemas.common import FileChange, AIResponse
 from typing import List
 
-@pytest.fixture(scope="function", autouse=True)
-def event_loop():
-    """Create a function-scoped event loop for integration tests.
-    
-    Using function scope with autouse=True prevents the
-    "RuntimeError: Task got Future attached to a different loop" issue
-    that occurs when mixing pytest-asyncio with SQLAlchemy async sessions.
-    """
-    policy = asyncio.get_event_loop_policy()
-    loop = policy.new_event_loop()
-    asyncio.set_event_loop(loop)
-    yield loop
-    # Clean up pending tasks
-    pending = asyncio.all_tasks(loop)
-    if pending:
-        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
-    loop.close()
-    asyncio.set_event_loop(None)
-
-@pytest_asyncio.fixture(scope="function")
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def test_engine():
-    """Create a function-scoped SQLAlchemy engine.
+    """Create one SQLAlchemy engine and schema for the whole test session.
     
-    Using function scope instead of session scope ensures a clean
-    database environment for each test and prevents event loop issues.
-    """    
-    # Create the engine with a smaller connection pool for tests
+    NullPool opens a fresh connection on every checkout, so no connection
+    outlives the event loop of the test that opened it.
+    """
     engine = create_async_engine(
-        str(settings.DATABASE_URL), 
+        str(settings.DATABASE_URL),
         echo=True,
-        poolclass=None,  # Disable connection pooling for tests
-        pool_pre_ping=True,  # Verify connections before use
-        future=True  # Use the future API for better compatibility
+        poolclass=NullPool,
+        pool_pre_ping=True  # Verify connections before use
     )
     
-    # Create tables
+    # Create tables once; each test rolls back its own changes
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     
@@ -68,42 +47,28 @@ async def test_engine():
     await engine.dispose()
 
 @pytest_asyncio.fixture(scope="function")
-async def async_session_factory(test_engine):
-    """Create a function-scoped session factory.
-    
-    This ensures each test has its own independent session factory
-    that isn't affected by other tests.
-    """
-    return async_sessionmaker(
-        bind=test_engine, 
-        class_=AsyncSession, 
-        expire_on_commit=False,
-        autoflush=False,
-        autocommit=False
-    )
-
-@pytest_asyncio.fixture(scope="function")
-async def db_session(async_session_factory):
-    """Create a function-scoped database session with transaction.
+async def db_session(test_engine):
+    """Create a function-scoped database session inside a rolled-back transaction.
     
-    This fixture creates a session with an active transaction, then rolls
-    it back at the end of the test to undo any changes.
+    The session joins an outer transaction on its own connection and turns
+    its commits into SAVEPOINT releases, so nothing a test writes survives
+    teardown and the schema never has to be rebuilt between tests.
     """
-    # Create a new session for each test
-    session = async_session_factory()
-    
-    # Start a regular transaction
-    await session.begin()
-    
-    try:
-        # Use the session in the test
-        yield session
-    finally:
-        # Rollback the transaction to undo any changes
-        await session.rollback()
-        
-        # Ensure the session is properly closed
-        await session.close()
+    async with test_engine.connect() as conn:
+        transaction = await conn.begin()
+        session = AsyncSession(
+            bind=conn,
+            join_transaction_mode="create_savepoint",
+            expire_on_commit=False,
+            autoflush=False
+        )
+        try:
+            # Use the session in the test
+            yield session
+        finally:
+            # Ensure the session is properly closed, then undo everything
+            await session.close()
+            await transaction.rollback()
 
 class TestOpenRouterService(OpenRouterService):
     """Test version of OpenRouterService that doesn't call actual API."""